@@ -6,18 +6,243 @@ Supports both browser cookie authentication and environment-based cookies.
 """
 
 import sys
+import importlib.util
 import os
 import json
+import functools
+import pickle
+import sqlite3
+import time
+import threading
+from contextlib import closing
 from pathlib import Path
 from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from http.cookiejar import Cookie, CookieJar
 
-# Add myfitnesspal library to path
-myfitnesspal_path = Path(__file__).parent / "myfitnesspal"
-sys.path.insert(0, str(myfitnesspal_path))
+from requests.adapters import HTTPAdapter
 
-import myfitnesspal
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+# Local copy of the myfitnesspal library
+myfitnesspal_path = Path(__file__).parent / "myfitnesspal" / "myfitnesspal"
+
+
+def _import_vendored_myfitnesspal():
+    """
+    Import the local myfitnesspal package without adding it to sys.path.
+    
+    Prepending the library directory to sys.path would add an extra entry
+    to every later import search in the process.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "myfitnesspal",
+        myfitnesspal_path / "__init__.py",
+        submodule_search_locations=[str(myfitnesspal_path)],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["myfitnesspal"] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules["myfitnesspal"]
+        raise
+    return module
+
+
+myfitnesspal = _import_vendored_myfitnesspal()
+
+from myfitnesspal.day import Day
+
+# Maximum number of days kept in each client's in-memory cache
+DAY_CACHE_SIZE = 256
+
+# Seconds before a cached copy of today (or a future date) is refetched,
+# so that live diary edits still show up
+LIVE_DAY_TTL = 60
+
+# Number of days fetched concurrently by get_date_range
+DATE_RANGE_WORKERS = 8
+
+# Keep-alive connections pooled per host; sized above DATE_RANGE_WORKERS so
+# concurrent tool calls can also reuse connections instead of reconnecting
+HTTP_POOL_SIZE = 16
+
+# Version of the pickled Day layout in the on-disk cache; bump it when the
+# stored format changes. Rows are also tied to the vendored library version.
+DISK_CACHE_FORMAT = 1
+
+
+@functools.lru_cache(maxsize=None)
+def _load_cookies_from_env() -> Optional[CookieJar]:
+    """
+    Load cookies from MFP_COOKIES environment variable if present.
+    
+    The jar is built once per process and reused by every client, since the
+    environment does not change after startup.
+    """
+    cookies_json = os.getenv('MFP_COOKIES')
+    
+    if not cookies_json:
+        return None
+    
+    try:
+        if orjson is not None:
+            cookie_dict = orjson.loads(cookies_json)
+        else:
+            cookie_dict = json.loads(cookies_json)
+        jar = CookieJar()
+        
+        for name, data in cookie_dict.items():
+            cookie = Cookie(
+                version=0,
+                name=name,
+                value=data['value'],
+                port=None,
+                port_specified=False,
+                domain=data.get('domain', '.myfitnesspal.com'),
+                domain_specified=True,
+                domain_initial_dot=data.get('domain', '').startswith('.'),
+                path=data.get('path', '/'),
+                path_specified=True,
+                secure=data.get('secure', False),
+                expires=None,
+                discard=True,
+                comment=None,
+                comment_url=None,
+                rest={},
+                rfc2109=False
+            )
+            jar.set_cookie(cookie)
+        
+        return jar
+        
+    except Exception as e:
+        print(f"Warning: Failed to load cookies from environment: {e}")
+        return None
+
+
+def _memoize_lazy_fields(day: Day) -> Day:
+    """
+    Make a Day's lazily-fetched fields (notes, water, exercises) fetch only once.
+    
+    The library issues a new HTTP request on every access to these properties,
+    which would defeat caching the Day itself.
+    """
+    for attr in ('_notes', '_water', '_exercises'):
+        loader = getattr(day, attr, None)
+        if loader is not None:
+            setattr(day, attr, functools.cache(loader))
+    return day
+
+
+
+def _prefetch_lazy_fields(day: Day) -> None:
+    """
+    Load a Day's water and exercises now, on the calling thread.
+    
+    Each property access issues its own HTTP request, so doing this on a
+    get_date_range worker keeps those requests concurrent instead of
+    leaving them for the caller to make one by one.
+    """
+    _ = day.water
+    _ = day.exercises
+
+
+class _Loaded:
+    """Picklable stand-in for a Day's lazy loader, returning an already-fetched value"""
+    
+    def __init__(self, value):
+        self.value = value
+    
+    def __call__(self):
+        return self.value
+
+
+def _snapshot_day(day: Day) -> Day:
+    """
+    Return a picklable copy of a Day whose water and exercises are already loaded.
+    
+    Notes are left out because no tool reads them and fetching them would
+    cost another request; get_day reattaches a live notes loader on a cache hit.
+    """
+    return Day(
+        date=day.date,
+        meals=day.meals,
+        goals=day.goals,
+        notes=None,
+        water=_Loaded(day.water),
+        exercises=_Loaded(day.exercises),
+        complete=day.complete,
+    )
+
+
+class DiskDayCache:
+    """
+    SQLite-backed cache of past days that survives server restarts.
+    
+    Only dates strictly before today are stored, since older diary entries
+    rarely change. Entries are keyed by MyFitnessPal username and date, and
+    rows written by a different cache format or library version are ignored.
+    Cache failures are never fatal; they just behave like a miss.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.format = f"{DISK_CACHE_FORMAT}:{myfitnesspal.__version__}"
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS days ("
+                "username TEXT NOT NULL, "
+                "date TEXT NOT NULL, "
+                "format TEXT NOT NULL, "
+                "data BLOB NOT NULL, "
+                "PRIMARY KEY (username, date))"
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+    
+    def get(self, username: str, target_date: date) -> Optional[Day]:
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT data FROM days WHERE username = ? AND date = ? AND format = ?",
+                    (username, target_date.isoformat(), self.format)
+                ).fetchone()
+            return pickle.loads(row[0]) if row else None
+        except Exception as e:
+            print(f"Warning: Failed to read day cache: {e}")
+            return None
+    
+    def set(self, username: str, target_date: date, day: Day) -> None:
+        try:
+            data = pickle.dumps(_snapshot_day(day), protocol=pickle.HIGHEST_PROTOCOL)
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO days (username, date, format, data) VALUES (?, ?, ?, ?)",
+                    (username, target_date.isoformat(), self.format, data)
+                )
+        except Exception as e:
+            print(f"Warning: Failed to write day cache: {e}")
+
+
+def _open_disk_cache() -> Optional[DiskDayCache]:
+    """Open the on-disk day cache at MFP_CACHE_PATH; disabled when unset"""
+    path = os.getenv('MFP_CACHE_PATH')
+    
+    if not path:
+        return None
+    
+    try:
+        return DiskDayCache(Path(path))
+    except Exception as e:
+        print(f"Warning: Failed to open day cache at {path}: {e}")
+        return None
 
 
 class MyFitnessPalClient:
@@ -31,7 +256,7 @@ class MyFitnessPalClient:
         1. MFP_COOKIES environment variable (for deployment)
         2. Browser cookies (for local development)
         """
-        cookiejar = self._load_cookies_from_env()
+        cookiejar = _load_cookies_from_env()
         
         if cookiejar:
             # Use cookies from environment
@@ -39,47 +264,19 @@ class MyFitnessPalClient:
         else:
             # Fall back to browser cookies
             self.client = myfitnesspal.Client()
-    
-    def _load_cookies_from_env(self) -> Optional[CookieJar]:
-        """Load cookies from MFP_COOKIES environment variable if present"""
-        cookies_json = os.getenv('MFP_COOKIES')
         
-        if not cookies_json:
-            return None
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        self.client.session.mount('https://', adapter)
+        self.client.session.mount('http://', adapter)
         
-        try:
-            cookie_dict = json.loads(cookies_json)
-            jar = CookieJar()
-            
-            for name, data in cookie_dict.items():
-                cookie = Cookie(
-                    version=0,
-                    name=name,
-                    value=data['value'],
-                    port=None,
-                    port_specified=False,
-                    domain=data.get('domain', '.myfitnesspal.com'),
-                    domain_specified=True,
-                    domain_initial_dot=data.get('domain', '').startswith('.'),
-                    path=data.get('path', '/'),
-                    path_specified=True,
-                    secure=data.get('secure', False),
-                    expires=None,
-                    discard=True,
-                    comment=None,
-                    comment_url=None,
-                    rest={},
-                    rfc2109=False
-                )
-                jar.set_cookie(cookie)
-            
-            return jar
-            
-        except Exception as e:
-            print(f"Warning: Failed to load cookies from environment: {e}")
-            return None
+        # date -> (fetched_at, fetched_as_past, Day)
+        self._day_cache: dict[date, tuple[float, bool, Day]] = {}
+        self._day_cache_lock = threading.Lock()
+        self._disk_cache = _open_disk_cache()
+        # Past days fetched from MyFitnessPal but not yet written to disk
+        self._unpersisted: set[date] = set()
     
-    def get_day(self, target_date: date):
+    def get_day(self, target_date: date) -> Day:
         """
         Get complete day data including meals, exercise, water, and notes.
         
@@ -91,20 +288,74 @@ class MyFitnessPalClient:
         - exercises: List of Exercise objects
         - notes: String (food notes)
         - complete: Boolean (whether day is marked complete)
+        
+        Results are cached per date. Days fetched after they ended are served
+        from the cache indefinitely (and persisted to disk by get_date_range,
+        once their water and exercises are loaded); days fetched
+        while still today (or later) are refetched after LIVE_DAY_TTL seconds,
+        even once they are in the past.
         """
-        return self.client.get_date(target_date)
+        now = time.monotonic()
+        is_past = target_date < date.today()
+        cached = self._day_cache.get(target_date)
+        if cached is not None:
+            fetched_at, fetched_as_past, day = cached
+            if fetched_as_past or now - fetched_at < LIVE_DAY_TTL:
+                return day
+        
+        day = None
+        if is_past and self._disk_cache is not None:
+            day = self._disk_cache.get(self.client.effective_username, target_date)
+            if day is not None:
+                # Notes aren't stored on disk; fetch them on demand like the library does
+                day._notes = functools.cache(lambda: self.client._get_notes(target_date))
+        
+        fetched = day is None
+        if fetched:
+            day = _memoize_lazy_fields(self.client.get_date(target_date))
+        
+        with self._day_cache_lock:
+            self._day_cache.pop(target_date, None)
+            self._day_cache[target_date] = (now, is_past, day)
+            if fetched and is_past and self._disk_cache is not None:
+                self._unpersisted.add(target_date)
+            if len(self._day_cache) > DAY_CACHE_SIZE:
+                # Evict the least recently fetched day
+                evicted = next(iter(self._day_cache))
+                self._day_cache.pop(evicted)
+                self._unpersisted.discard(evicted)
+        
+        return day
     
     def get_date_range(self, start_date: date, end_date: date):
         """
         Get data for multiple days.
         
-        Yields Day objects for each date in the range.
+        Days are fetched concurrently on a thread pool and yielded in date
+        order. Days that fail to load are skipped.
         """
-        current = start_date
-        while current <= end_date:
-            try:
-                yield self.get_day(current)
-            except Exception:
-                # Skip days with errors
-                pass
-            current = current + timedelta(days=1)
+        num_days = (end_date - start_date).days + 1
+        if num_days <= 0:
+            return
+        
+        dates = [start_date + timedelta(days=i) for i in range(num_days)]
+        
+        with ThreadPoolExecutor(max_workers=min(DATE_RANGE_WORKERS, num_days)) as executor:
+            for day in executor.map(self._fetch_day_for_range, dates):
+                if day is not None:
+                    yield day
+    
+    def _fetch_day_for_range(self, target_date: date) -> Optional[Day]:
+        """Fetch a day and its lazy fields, returning None on error"""
+        try:
+            day = self.get_day(target_date)
+            _prefetch_lazy_fields(day)
+        except Exception:
+            # Skip days with errors
+            return None
+        
+        if target_date in self._unpersisted:
+            self._unpersisted.discard(target_date)
+            self._disk_cache.set(self.client.effective_username, target_date, day)
+        
+        return day
@@ -6,13 +6,19 @@ Extracts MyFitnessPal cookies from your browser and saves them to .env file
 for deployment scenarios where browser access isn't available (servers, containers, etc.)
 """
 
-import browser_cookie3
 import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
 
 def export_cookies_to_env():
     """Extract cookies from browser and save to .env file"""
+    import browser_cookie3
+    
     print("🍪 Extracting MyFitnessPal cookies from browser...")
     
     # Get cookies from browser
@@ -38,7 +44,10 @@ def export_cookies_to_env():
     env_path = Path(__file__).parent / '.env'
     
     # Convert to JSON string for single env var
-    cookies_json = json.dumps(cookie_dict, indent=None)
+    if orjson is not None:
+        cookies_json = orjson.dumps(cookie_dict).decode()
+    else:
+        cookies_json = json.dumps(cookie_dict, indent=None)
     
     with open(env_path, 'w') as f:
         f.write("# MyFitnessPal Cookies (extracted from browser)\n")
@@ -63,6 +72,8 @@ def export_cookies_to_env():
 
 def export_cookies_to_json():
     """Extract cookies and save as JSON file (alternative format)"""
+    import browser_cookie3
+    
     print("🍪 Extracting MyFitnessPal cookies from browser...")
     
     cookies = browser_cookie3.load(domain_name='myfitnesspal.com')
@@ -86,8 +97,12 @@ def export_cookies_to_json():
     
     json_path = Path(__file__).parent / 'mfp_cookies.json'
     
-    with open(json_path, 'w') as f:
-        json.dump(cookie_list, f, indent=2)
+    if orjson is not None:
+        with open(json_path, 'wb') as f:
+            f.write(orjson.dumps(cookie_list, option=orjson.OPT_INDENT_2))
+    else:
+        with open(json_path, 'w') as f:
+            json.dump(cookie_list, f, indent=2)
     
     print(f"✓ Saved cookies to {json_path}")
     print("\n⚠️  Keep this file secure - it grants access to your account!")
@@ -7,14 +7,15 @@ from MyFitnessPal using the python-myfitnesspal library.
 """
 
 import os
-from datetime import date, datetime, timedelta
-from typing import Optional
+import threading
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
 from dotenv import load_dotenv
 
 from fastmcp import FastMCP
 
 from api_client import MyFitnessPalClient
-from utils import text_response
+from utils import ML_TO_OZ, format_long_date, run_in_thread, text_response, water_conv
 
 # Load environment variables
 load_dotenv()
@@ -32,14 +33,39 @@ mcp = FastMCP(
 
 # Global client instance (lazy initialization)
 _client: Optional[MyFitnessPalClient] = None
+_client_lock = threading.Lock()
+
+# Nutrients reported by get_daily_macros
+MACRO_KEYS = (
+    'calories', 'carbohydrates', 'protein', 'fat',
+    'saturated fat', 'polyunsaturated fat', 'monounsaturated fat', 'trans fat',
+    'fiber', 'sugar',
+    'sodium', 'potassium', 'cholesterol',
+    'vitamin a', 'vitamin c', 'calcium', 'iron',
+)
+
+
+class DayRecord(NamedTuple):
+    """Per-day figures collected by get_date_range_summary"""
+    date: date
+    calories: float
+    carbs: float
+    fat: float
+    protein: float
+    water_ml: float
+    complete: bool
+    num_meals: int
+    num_exercises: int
 
 
 def get_client() -> MyFitnessPalClient:
     """Get or create MyFitnessPal client instance"""
     global _client
     
-    if _client is None:
-        _client = MyFitnessPalClient()
+    # Tools run in worker threads, so guard against concurrent first calls
+    with _client_lock:
+        if _client is None:
+            _client = MyFitnessPalClient()
     
     return _client
 
@@ -49,13 +75,23 @@ def parse_date(date_str: Optional[str]) -> date:
     if not date_str:
         return date.today()
     
+    parts = date_str.split('-')
+    if not (
+        len(parts) == 3 and date_str.isascii()
+        and all(part.isdigit() for part in parts)
+        and len(parts[0]) == 4 and 1 <= len(parts[1]) <= 2 and 1 <= len(parts[2]) <= 2
+    ):
+        raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD")
+    
+    year, month, day = parts
     try:
-        return datetime.strptime(date_str, '%Y-%m-%d').date()
+        return date(int(year), int(month), int(day))
     except ValueError:
         raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD")
 
 
 @mcp.tool
+@run_in_thread
 def get_daily_summary(date: Optional[str] = None):
     """
     Get daily nutrition overview: calories consumed/remaining, macro breakdown, water, and goals.
@@ -87,26 +123,23 @@ def get_daily_summary(date: Optional[str] = None):
         
         # Water (library returns milliliters)
         water_ml = day.water
-        water_oz = water_ml / 29.5735  # Convert ml to oz
-        water_cups = water_ml / 236.588  # Convert ml to cups
+        water_oz, water_cups = water_conv(water_ml)
         
         # Exercise summary
-        exercises = day.exercises
+        exercise_entries = [entry for exercise in day.exercises for entry in exercise.entries]
+        exercise_count = len(exercise_entries)
         total_exercise_calories = 0
         total_exercise_minutes = 0
-        exercise_count = 0
         
-        for exercise in exercises:
-            for entry in exercise.entries:
-                exercise_count += 1
-                nutrition = entry.nutrition_information
-                total_exercise_calories += nutrition.get('calories burned', 0)
-                minutes = nutrition.get('minutes')
-                if minutes:
-                    total_exercise_minutes += minutes
+        for entry in exercise_entries:
+            nutrition = entry.nutrition_information
+            total_exercise_calories += nutrition.get('calories burned', 0)
+            minutes = nutrition.get('minutes')
+            if minutes:
+                total_exercise_minutes += minutes
         
         # Format output
-        output = f"""# Daily Summary for {target_date.strftime('%B %d, %Y')}
+        output = f"""# Daily Summary for {format_long_date(target_date)}
 
 ## Calories
 - **Consumed**: {calories:.0f} kcal
@@ -138,6 +171,7 @@ def get_daily_summary(date: Optional[str] = None):
 
 
 @mcp.tool
+@run_in_thread
 def get_daily_meals(date: Optional[str] = None):
     """
     Get detailed meal-by-meal breakdown with all foods, servings, and calories.
@@ -152,46 +186,47 @@ def get_daily_meals(date: Optional[str] = None):
         # Fetch day data
         day = client.get_day(target_date)
         
-        output = f"# Meals for {target_date.strftime('%B %d, %Y')}\n\n"
+        parts = [f"# Meals for {format_long_date(target_date)}\n\n"]
         
         if not day.meals:
-            output += "No meals logged for this day.\n"
+            parts.append("No meals logged for this day.\n")
         else:
             for meal in day.meals:
                 meal_totals = meal.totals
                 meal_calories = meal_totals.get('calories', 0)
                 
-                output += f"## {meal.name}\n"
-                output += f"**Total**: {meal_calories:.0f} kcal"
+                parts.append(f"## {meal.name}\n")
+                parts.append(f"**Total**: {meal_calories:.0f} kcal")
                 
                 # Show meal macros
                 meal_carbs = meal_totals.get('carbohydrates', 0)
                 meal_fat = meal_totals.get('fat', 0)
                 meal_protein = meal_totals.get('protein', 0)
-                output += f" ({meal_carbs:.0f}C / {meal_fat:.0f}F / {meal_protein:.0f}P)\n\n"
+                parts.append(f" ({meal_carbs:.0f}C / {meal_fat:.0f}F / {meal_protein:.0f}P)\n\n")
                 
                 if meal.entries:
                     for entry in meal.entries:
                         nutrition = entry.nutrition_information
                         
-                        output += f"- **{entry.name}**\n"
-                        output += f"  - Serving: {entry.quantity} {entry.unit}\n"
-                        output += f"  - Calories: {nutrition.get('calories', 0):.0f} kcal\n"
-                        output += f"  - Macros: "
-                        output += f"{nutrition.get('carbohydrates', 0):.0f}C / "
-                        output += f"{nutrition.get('fat', 0):.0f}F / "
-                        output += f"{nutrition.get('protein', 0):.0f}P\n"
-                    output += "\n"
+                        parts.append(f"- **{entry.name}**\n")
+                        parts.append(f"  - Serving: {entry.quantity} {entry.unit}\n")
+                        parts.append(f"  - Calories: {nutrition.get('calories', 0):.0f} kcal\n")
+                        parts.append(f"  - Macros: ")
+                        parts.append(f"{nutrition.get('carbohydrates', 0):.0f}C / ")
+                        parts.append(f"{nutrition.get('fat', 0):.0f}F / ")
+                        parts.append(f"{nutrition.get('protein', 0):.0f}P\n")
+                    parts.append("\n")
                 else:
-                    output += "No foods logged in this meal.\n\n"
+                    parts.append("No foods logged in this meal.\n\n")
         
-        return text_response(output)
+        return text_response("".join(parts))
         
     except Exception as e:
         return text_response(f"Error retrieving meals: {str(e)}")
 
 
 @mcp.tool
+@run_in_thread
 def get_daily_exercise(date: Optional[str] = None):
     """
     Get exercise activities: cardio (duration, calories) and strength (sets, reps, weight).
@@ -207,10 +242,10 @@ def get_daily_exercise(date: Optional[str] = None):
         day = client.get_day(target_date)
         exercises = day.exercises
         
-        output = f"# Exercise for {target_date.strftime('%B %d, %Y')}\n\n"
+        parts = [f"# Exercise for {format_long_date(target_date)}\n\n"]
         
         if not exercises:
-            output += "No exercise logged for this day.\n"
+            parts.append("No exercise logged for this day.\n")
         else:
             # Collect all exercise entries from all exercise categories
             all_entries = []
@@ -218,7 +253,7 @@ def get_daily_exercise(date: Optional[str] = None):
                 all_entries.extend(exercise.entries)
             
             if not all_entries:
-                output += "No exercise logged for this day.\n"
+                parts.append("No exercise logged for this day.\n")
             else:
                 total_calories = 0
                 total_minutes = 0
@@ -226,36 +261,51 @@ def get_daily_exercise(date: Optional[str] = None):
                 for entry in all_entries:
                     nutrition = entry.nutrition_information
                     
-                    output += f"- **{entry.name}**\n"
+                    parts.append(f"- **{entry.name}**\n")
                     
                     # Duration
                     minutes = nutrition.get('minutes')
                     if minutes:
-                        output += f"  - Duration: {minutes:.0f} minutes\n"
+                        parts.append(f"  - Duration: {minutes:.0f} minutes\n")
                         total_minutes += minutes
                     
                     # Calories burned
                     calories = nutrition.get('calories burned', 0)
                     if calories:
-                        output += f"  - Calories Burned: {calories:.0f} kcal\n"
+                        parts.append(f"  - Calories Burned: {calories:.0f} kcal\n")
                         total_calories += calories
                     
-                    output += "\n"
+                    parts.append("\n")
                 
                 # Summary
-                output += "## Summary\n"
+                parts.append("## Summary\n")
                 if total_minutes > 0:
-                    output += f"- **Total Duration**: {total_minutes:.0f} minutes\n"
+                    parts.append(f"- **Total Duration**: {total_minutes:.0f} minutes\n")
                 if total_calories > 0:
-                    output += f"- **Total Calories Burned**: {total_calories:.0f} kcal\n"
+                    parts.append(f"- **Total Calories Burned**: {total_calories:.0f} kcal\n")
         
-        return text_response(output)
+        return text_response("".join(parts))
         
     except Exception as e:
         return text_response(f"Error retrieving exercise: {str(e)}")
 
 
+# Nutrient line templates for get_daily_macros, with and without a goal
+_NUT_FMT_GOAL = "- **{}**: {:.0f}{} / {:.0f}{} ({:.0f}%)\n"
+_NUT_FMT = "- **{}**: {:.0f}{}\n"
+
+
+def format_nutrient(values: dict, goals: dict, name: str, display_name: str, unit: str = "g") -> str:
+    """Format one nutrient line, including goal progress when a goal is set"""
+    value = values[name] or 0
+    goal = goals.get(name, 0)
+    if goal > 0:
+        return _NUT_FMT_GOAL.format(display_name, value, unit, goal, unit, value / goal * 100)
+    return _NUT_FMT.format(display_name, value, unit)
+
+
 @mcp.tool
+@run_in_thread
 def get_daily_macros(date: Optional[str] = None):
     """
     Get comprehensive macro and micronutrient breakdown with all tracked nutrients.
@@ -273,63 +323,59 @@ def get_daily_macros(date: Optional[str] = None):
         totals = day.totals
         goals = day.goals
         
-        output = f"# Macros & Nutrients for {target_date.strftime('%B %d, %Y')}\n\n"
+        # Look up every tracked nutrient once; None marks nutrients not tracked
+        vals = {key: totals.get(key) for key in MACRO_KEYS}
         
-        # Macronutrients
-        output += "## Macronutrients\n"
+        parts = [f"# Macros & Nutrients for {format_long_date(target_date)}\n\n"]
         
-        def format_nutrient(name: str, display_name: str, unit: str = "g"):
-            value = totals.get(name, 0)
-            goal = goals.get(name, 0)
-            if goal > 0:
-                return f"- **{display_name}**: {value:.0f}{unit} / {goal:.0f}{unit} ({value/goal*100:.0f}%)\n"
-            else:
-                return f"- **{display_name}**: {value:.0f}{unit}\n"
+        # Macronutrients
+        parts.append("## Macronutrients\n")
         
-        output += format_nutrient('calories', 'Calories', 'kcal')
-        output += format_nutrient('carbohydrates', 'Carbohydrates')
-        output += format_nutrient('protein', 'Protein')
-        output += format_nutrient('fat', 'Fat')
+        parts.append(format_nutrient(vals, goals, 'calories', 'Calories', 'kcal'))
+        parts.append(format_nutrient(vals, goals, 'carbohydrates', 'Carbohydrates'))
+        parts.append(format_nutrient(vals, goals, 'protein', 'Protein'))
+        parts.append(format_nutrient(vals, goals, 'fat', 'Fat'))
         
         # Fat breakdown if available
-        if 'saturated fat' in totals:
-            output += f"  - Saturated: {totals.get('saturated fat', 0):.1f}g\n"
-        if 'polyunsaturated fat' in totals:
-            output += f"  - Polyunsaturated: {totals.get('polyunsaturated fat', 0):.1f}g\n"
-        if 'monounsaturated fat' in totals:
-            output += f"  - Monounsaturated: {totals.get('monounsaturated fat', 0):.1f}g\n"
-        if 'trans fat' in totals:
-            output += f"  - Trans: {totals.get('trans fat', 0):.1f}g\n"
-        
-        output += format_nutrient('fiber', 'Fiber')
-        output += format_nutrient('sugar', 'Sugar')
-        output += "\n"
+        if (value := vals['saturated fat']) is not None:
+            parts.append(f"  - Saturated: {value:.1f}g\n")
+        if (value := vals['polyunsaturated fat']) is not None:
+            parts.append(f"  - Polyunsaturated: {value:.1f}g\n")
+        if (value := vals['monounsaturated fat']) is not None:
+            parts.append(f"  - Monounsaturated: {value:.1f}g\n")
+        if (value := vals['trans fat']) is not None:
+            parts.append(f"  - Trans: {value:.1f}g\n")
+        
+        parts.append(format_nutrient(vals, goals, 'fiber', 'Fiber'))
+        parts.append(format_nutrient(vals, goals, 'sugar', 'Sugar'))
+        parts.append("\n")
         
         # Micronutrients
-        output += "## Micronutrients\n"
-        
-        if 'sodium' in totals:
-            output += format_nutrient('sodium', 'Sodium', 'mg')
-        if 'potassium' in totals:
-            output += format_nutrient('potassium', 'Potassium', 'mg')
-        if 'cholesterol' in totals:
-            output += format_nutrient('cholesterol', 'Cholesterol', 'mg')
-        if 'vitamin a' in totals:
-            output += format_nutrient('vitamin a', 'Vitamin A', '%')
-        if 'vitamin c' in totals:
-            output += format_nutrient('vitamin c', 'Vitamin C', '%')
-        if 'calcium' in totals:
-            output += format_nutrient('calcium', 'Calcium', '%')
-        if 'iron' in totals:
-            output += format_nutrient('iron', 'Iron', '%')
-        
-        return text_response(output)
+        parts.append("## Micronutrients\n")
+        
+        if vals['sodium'] is not None:
+            parts.append(format_nutrient(vals, goals, 'sodium', 'Sodium', 'mg'))
+        if vals['potassium'] is not None:
+            parts.append(format_nutrient(vals, goals, 'potassium', 'Potassium', 'mg'))
+        if vals['cholesterol'] is not None:
+            parts.append(format_nutrient(vals, goals, 'cholesterol', 'Cholesterol', 'mg'))
+        if vals['vitamin a'] is not None:
+            parts.append(format_nutrient(vals, goals, 'vitamin a', 'Vitamin A', '%'))
+        if vals['vitamin c'] is not None:
+            parts.append(format_nutrient(vals, goals, 'vitamin c', 'Vitamin C', '%'))
+        if vals['calcium'] is not None:
+            parts.append(format_nutrient(vals, goals, 'calcium', 'Calcium', '%'))
+        if vals['iron'] is not None:
+            parts.append(format_nutrient(vals, goals, 'iron', 'Iron', '%'))
+        
+        return text_response("".join(parts))
         
     except Exception as e:
         return text_response(f"Error retrieving macros: {str(e)}")
 
 
 @mcp.tool
+@run_in_thread
 def get_water_intake(date: Optional[str] = None):
     """
     Get water consumption for a specific day.
@@ -344,30 +390,30 @@ def get_water_intake(date: Optional[str] = None):
         # Fetch day data
         day = client.get_day(target_date)
         water_ml = day.water  # Library returns milliliters
-        water_oz = water_ml / 29.5735  # Convert to ounces
-        water_cups = water_ml / 236.588  # Convert to cups
+        water_oz, water_cups = water_conv(water_ml)
         
-        output = f"# Water Intake for {target_date.strftime('%B %d, %Y')}\n\n"
+        parts = [f"# Water Intake for {format_long_date(target_date)}\n\n"]
         
         if water_ml > 0:
-            output += f"**Amount**: {water_oz:.0f} oz ({water_cups:.1f} cups / {water_ml:.0f} ml)\n"
+            parts.append(f"**Amount**: {water_oz:.0f} oz ({water_cups:.1f} cups / {water_ml:.0f} ml)\n")
         else:
-            output += "No water intake logged for this day.\n"
+            parts.append("No water intake logged for this day.\n")
         
         # Add helpful context
-        output += f"\n*Recommended daily intake: 64 oz (8 cups / 2000 ml)*\n"
+        parts.append(f"\n*Recommended daily intake: 64 oz (8 cups / 2000 ml)*\n")
         
         if water_ml > 0:
             progress = (water_oz / 64) * 100
-            output += f"*Progress: {progress:.0f}% of recommended amount*\n"
+            parts.append(f"*Progress: {progress:.0f}% of recommended amount*\n")
         
-        return text_response(output)
+        return text_response("".join(parts))
         
     except Exception as e:
         return text_response(f"Error retrieving water intake: {str(e)}")
 
 
 @mcp.tool
+@run_in_thread
 def get_date_range_summary(start_date: str, end_date: str):
     """
     Get aggregate nutrition data over a date range with trends and insights.
@@ -385,76 +431,95 @@ def get_date_range_summary(start_date: str, end_date: str):
         
         client = get_client()
         
-        # Collect data for each day
+        # Collect data for each day, accumulating totals in the same pass
         daily_data = []
+        total_calories = total_carbs = total_fat = total_protein = total_water_ml = 0
+        complete_days = 0
+        days_with_exercise = 0
         
         for day in client.get_date_range(start, end):
             totals = day.totals
             
-            daily_data.append({
-                'date': day.date,
-                'calories': totals.get('calories', 0),
-                'carbs': totals.get('carbohydrates', 0),
-                'fat': totals.get('fat', 0),
-                'protein': totals.get('protein', 0),
-                'water_ml': day.water,  # Store as ml
-                'complete': day.complete,
-                'num_meals': len(day.meals),
-                'num_exercises': len(day.exercises)
-            })
+            calories = totals.get('calories', 0)
+            carbs = totals.get('carbohydrates', 0)
+            fat = totals.get('fat', 0)
+            protein = totals.get('protein', 0)
+            water_ml = day.water  # Store as ml
+            complete = day.complete
+            num_exercises = len(day.exercises)
+            
+            daily_data.append(DayRecord(
+                date=day.date,
+                calories=calories,
+                carbs=carbs,
+                fat=fat,
+                protein=protein,
+                water_ml=water_ml,
+                complete=complete,
+                num_meals=len(day.meals),
+                num_exercises=num_exercises,
+            ))
+            
+            total_calories += calories
+            total_carbs += carbs
+            total_fat += fat
+            total_protein += protein
+            total_water_ml += water_ml
+            if complete:
+                complete_days += 1
+            if num_exercises > 0:
+                days_with_exercise += 1
         
         if not daily_data:
             return text_response("No data available for the specified date range.")
         
         # Calculate aggregates
         num_days = len(daily_data)
-        avg_calories = sum(d['calories'] for d in daily_data) / num_days
-        avg_carbs = sum(d['carbs'] for d in daily_data) / num_days
-        avg_fat = sum(d['fat'] for d in daily_data) / num_days
-        avg_protein = sum(d['protein'] for d in daily_data) / num_days
-        avg_water_ml = sum(d['water_ml'] for d in daily_data) / num_days
-        avg_water_oz = avg_water_ml / 29.5735
-        
-        complete_days = sum(1 for d in daily_data if d['complete'])
-        days_with_exercise = sum(1 for d in daily_data if d['num_exercises'] > 0)
+        avg_calories = total_calories / num_days
+        avg_carbs = total_carbs / num_days
+        avg_fat = total_fat / num_days
+        avg_protein = total_protein / num_days
+        avg_water_ml = total_water_ml / num_days
+        avg_water_oz = avg_water_ml * ML_TO_OZ
         
         # Format output
-        output = f"# Date Range Summary\n"
-        output += f"**{start.strftime('%B %d, %Y')}** to **{end.strftime('%B %d, %Y')}**\n"
-        output += f"({num_days} days)\n\n"
-        
-        output += "## Daily Averages\n"
-        output += f"- **Calories**: {avg_calories:.0f} kcal/day\n"
-        output += f"- **Carbohydrates**: {avg_carbs:.0f}g/day\n"
-        output += f"- **Fat**: {avg_fat:.0f}g/day\n"
-        output += f"- **Protein**: {avg_protein:.0f}g/day\n"
-        output += f"- **Water**: {avg_water_oz:.0f} oz/day ({avg_water_ml:.0f} ml/day)\n\n"
-        
-        output += "## Tracking Stats\n"
-        output += f"- **Days Completed**: {complete_days}/{num_days} ({complete_days/num_days*100:.0f}%)\n"
-        output += f"- **Days with Exercise**: {days_with_exercise}/{num_days} ({days_with_exercise/num_days*100:.0f}%)\n\n"
-        
-        output += "## Daily Breakdown\n"
+        parts = ["# Date Range Summary\n"]
+        parts.append(f"**{format_long_date(start)}** to **{format_long_date(end)}**\n")
+        parts.append(f"({num_days} days)\n\n")
+        
+        parts.append("## Daily Averages\n")
+        parts.append(f"- **Calories**: {avg_calories:.0f} kcal/day\n")
+        parts.append(f"- **Carbohydrates**: {avg_carbs:.0f}g/day\n")
+        parts.append(f"- **Fat**: {avg_fat:.0f}g/day\n")
+        parts.append(f"- **Protein**: {avg_protein:.0f}g/day\n")
+        parts.append(f"- **Water**: {avg_water_oz:.0f} oz/day ({avg_water_ml:.0f} ml/day)\n\n")
+        
+        parts.append("## Tracking Stats\n")
+        parts.append(f"- **Days Completed**: {complete_days}/{num_days} ({complete_days/num_days*100:.0f}%)\n")
+        parts.append(f"- **Days with Exercise**: {days_with_exercise}/{num_days} ({days_with_exercise/num_days*100:.0f}%)\n\n")
+        
+        parts.append("## Daily Breakdown\n")
+        append = parts.append
         for day_data in daily_data:
-            d = day_data['date']
-            water_oz = day_data['water_ml'] / 29.5735
-            output += f"- **{d.strftime('%Y-%m-%d')}**: "
-            output += f"{day_data['calories']:.0f} kcal, "
-            output += f"{day_data['carbs']:.0f}C/{day_data['fat']:.0f}F/{day_data['protein']:.0f}P, "
-            output += f"{water_oz:.0f} oz water"
+            d = day_data.date
+            water_oz = day_data.water_ml * ML_TO_OZ
+            append(f"- **{d.isoformat()}**: ")
+            append(f"{day_data.calories:.0f} kcal, ")
+            append(f"{day_data.carbs:.0f}C/{day_data.fat:.0f}F/{day_data.protein:.0f}P, ")
+            append(f"{water_oz:.0f} oz water")
             
             status = []
-            if day_data['complete']:
+            if day_data.complete:
                 status.append("✓")
-            if day_data['num_exercises'] > 0:
-                status.append(f"{day_data['num_exercises']} exercises")
+            if day_data.num_exercises > 0:
+                status.append(f"{day_data.num_exercises} exercises")
             
             if status:
-                output += f" [{', '.join(status)}]"
+                append(f" [{', '.join(status)}]")
             
-            output += "\n"
+            append("\n")
         
-        return text_response(output)
+        return text_response("".join(parts))
         
     except Exception as e:
         return text_response(f"Error retrieving date range summary: {str(e)}")
@@ -466,7 +531,15 @@ def main():
     mcp_port = os.getenv("PORT", None)
     
     if mcp_port:
-        mcp.run(port=int(mcp_port), host=mcp_host, transport="streamable-http")
+        try:
+            import uvloop  # optional, faster event loop for the HTTP transport
+        except ImportError:
+            uvloop = None
+        
+        if uvloop is not None:
+            uvloop.run(mcp.run_async(port=int(mcp_port), host=mcp_host, transport="streamable-http"))
+        else:
+            mcp.run(port=int(mcp_port), host=mcp_host, transport="streamable-http")
     else:
         mcp.run()    
 if __name__ == "__main__":
@@ -1,6 +1,20 @@
+import asyncio
+import functools
+from datetime import date
+
 from fastmcp.tools.tool import ToolResult
 from mcp.types import TextContent
 
+# Water unit conversion factors (US fluid ounces and cups per milliliter)
+ML_TO_OZ = 1 / 29.5735
+ML_TO_CUPS = 1 / 236.588
+
+# English month names, so long dates don't depend on the process locale
+_MONTHS = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+)
+
 
 def text_response(text: str) -> ToolResult:
     """Return raw text as a ToolResult without JSON wrapping overhead."""
@@ -8,3 +22,21 @@ def text_response(text: str) -> ToolResult:
         content=[TextContent(type="text", text=text)],
         structured_content=None  # Explicitly disable structured content
     )
+
+
+def water_conv(ml: float) -> tuple[float, float]:
+    """Convert a water amount in milliliters to (ounces, cups)."""
+    return ml * ML_TO_OZ, ml * ML_TO_CUPS
+
+
+def format_long_date(d: date) -> str:
+    """Format a date like 'March 01, 2024' (same as strftime('%B %d, %Y') in the C locale)."""
+    return f"{_MONTHS[d.month - 1]} {d.day:02d}, {d.year}"
+
+
+def run_in_thread(fn):
+    """Wrap a blocking tool function so it runs in a worker thread instead of the event loop."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper